@@ -29,17 +29,38 @@
 # 
 # **Required packages:**
 # ```
-# pip install requests duckdb pandas altair
+# pip install requests "duckdb>=1.4.0" pandas pyarrow altair
 # ```
 
 # %% [markdown]
 # ## Step 1: Setup and Imports
 
 # %%
+import csv
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import requests
+from requests.adapters import HTTPAdapter
 import duckdb
+import pyarrow as pa
+from pyarrow import csv as pcsv
 import altair as alt
-from pathlib import Path
+
+# %%
+# Set to True to print the data previews and column listings along the way.
+# Leave it off for batch runs that only need the final outputs.
+DEBUG = False
+
+# %%
+def _sql_literal(value):
+    """Quote `value` as a SQL string literal, escaping any single quotes."""
+    return "'" + value.replace("'", "''") + "'"
+
 
 # %%
 # Create a data folder to store our files
@@ -60,61 +81,266 @@ print(f"Data will be saved to: {DATA_DIR.absolute()}")
 INDICATOR_URL = "https://data360files.worldbank.org/data360-data/data/WB_WDI/WB_WDI_SL_TLF_CACT_ZS.csv"
 DICTIONARY_URL = "https://data360files.worldbank.org/data360-data/data/WB_WDI/WB_WDI_SL_TLF_CACT_ZS_DATADICT.csv"
 
+# Set to False for a one-shot run: the CSVs are streamed straight into memory
+# and none of the cache files (CSV, Parquet, Arrow) are written. The chart files
+# from Step 7 are still saved to the data folder.
+CACHE_DOWNLOADS = True
+
 # Local file paths
 INDICATOR_FILE = DATA_DIR / "labor_force_data.csv"
 DICTIONARY_FILE = DATA_DIR / "data_dictionary.csv"
 
+# Expected blake2b digest of each download, used to catch truncated or corrupt
+# files. None skips the check; paste in the digest printed below to pin a file.
+EXPECTED_BLAKE2B = {
+    INDICATOR_URL: None,
+    DICTIONARY_URL: None,
+}
+
+# Parquet copies of the CSVs, written on the first run (see Step 3)
+INDICATOR_PARQUET = DATA_DIR / "labor_force_data.parquet"
+DICTIONARY_PARQUET = DATA_DIR / "data_dictionary.parquet"
+
+# Cleaned, region-tagged indicator table, written on the first run (see Step 5)
+INDICATOR_ARROW = DATA_DIR / "indicator_with_region.arrows"
+
+# String versions of the paths, built once for SQL queries and file checks
+INDICATOR_STR = os.fspath(INDICATOR_FILE)
+DICTIONARY_STR = os.fspath(DICTIONARY_FILE)
+INDICATOR_PARQUET_STR = os.fspath(INDICATOR_PARQUET)
+DICTIONARY_PARQUET_STR = os.fspath(DICTIONARY_PARQUET)
+INDICATOR_ARROW_STR = os.fspath(INDICATOR_ARROW)
+
 # %%
-# Download indicator data (skip if already exists)
-if not INDICATOR_FILE.exists():
-    print("Downloading indicator data...")
-    response = requests.get(INDICATOR_URL, timeout=60)
-    response.raise_for_status()
-    INDICATOR_FILE.write_bytes(response.content)
-    print(f"Saved to {INDICATOR_FILE}")
-else:
-    print(f"Using cached file: {INDICATOR_FILE}")
+def _blake2b(path):
+    """Return the blake2b digest of the file at `path`, as a hex string."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_stale(target, source):
+    """Return True if `target` is missing or older than `source` (one stat call each)."""
+    try:
+        target_mtime = os.stat(target).st_mtime
+    except FileNotFoundError:
+        return True
+    return target_mtime < os.stat(source).st_mtime
+
+
+def _download(url, path, session, expected=None):
+    """Stream `url` into `path`, checking its blake2b digest against `expected` if given.
+
+    The data goes to a `.part` file first and is only moved into place once the
+    download has finished and passed its check, so an interrupted download
+    never leaves a broken file behind to be reused.
+    """
+    print(f"Downloading {url}...")
+    tmp = path.with_suffix(path.suffix + ".part")
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with session.get(url, stream=True, timeout=60) as response, open(tmp, "wb") as f:
+            response.raise_for_status()
+            for chunk in response.iter_content(1 << 20):
+                f.write(chunk)
+                digest.update(chunk)
+        if expected is not None and digest.hexdigest() != expected:
+            raise ValueError(f"Download of {url} failed its check: got blake2b {digest.hexdigest()}, expected {expected}")
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    print(f"Saved to {path} (blake2b={digest.hexdigest()})")
+
+
+def _fetch(url, path, session):
+    """Download `url` into `path` unless a cached copy with the expected digest exists."""
+    expected = EXPECTED_BLAKE2B.get(url)
+    if expected is None:
+        # Nothing pinned, so a cached file is reused without reading it
+        try:
+            os.stat(path)
+        except FileNotFoundError:
+            pass
+        else:
+            print(f"Using cached file: {path}")
+            return
+    else:
+        try:
+            digest = _blake2b(path)
+        except FileNotFoundError:
+            pass
+        else:
+            if digest == expected:
+                print(f"Using cached file: {path} (blake2b={digest})")
+                return
+            print(f"Cached file {path} failed its check, downloading again")
+            path.unlink()
+
+    _download(url, path, session, expected)
+
 
 # %%
-# Download dictionary data (skip if already exists)
-if not DICTIONARY_FILE.exists():
-    print("Downloading dictionary data...")
-    response = requests.get(DICTIONARY_URL, timeout=60)
-    response.raise_for_status()
-    DICTIONARY_FILE.write_bytes(response.content)
-    print(f"Saved to {DICTIONARY_FILE}")
+# Download both files at the same time over one pooled session.
+# Streaming writes each response straight to disk instead of holding it in memory.
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=2))
+
+if CACHE_DOWNLOADS:
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(
+            lambda job: _fetch(*job, session),
+            [(INDICATOR_URL, INDICATOR_FILE), (DICTIONARY_URL, DICTIONARY_FILE)],
+        ))
 else:
-    print(f"Using cached file: {DICTIONARY_FILE}")
+    print("CACHE_DOWNLOADS is off: the data will be streamed in Step 3")
 
 # %% [markdown]
 # ## Step 3: Load CSVs into DuckDB
 # 
 # DuckDB can read CSV files directly - no need to load into pandas first!
 # This is faster and more memory efficient for large files.
+# On the first run we also save Parquet copies, which load much faster next time.
+# With `CACHE_DOWNLOADS = False` the CSVs are instead streamed straight into memory.
 
 # %%
-# Create a DuckDB connection
-DB_PATH = DATA_DIR / "worldbank.duckdb"
-conn = duckdb.connect(str(DB_PATH))
+# Create an in-memory DuckDB connection.
+# The data is small enough to live in RAM, so we skip the disk writes a database
+# file would need. Set SAVE_TO_DISK to keep the final tables (see Step 8).
+SAVE_TO_DISK = False
+
+conn = duckdb.connect()
+conn.execute(f"PRAGMA threads={os.cpu_count()}")
 
-print(f"Connected to DuckDB: {DB_PATH}")
+print("Connected to in-memory DuckDB")
 
 # %%
-# Load indicator CSV directly into DuckDB
-conn.execute(f"""
-    CREATE OR REPLACE TABLE indicator_raw AS
-    SELECT * FROM read_csv_auto('{INDICATOR_FILE}', header=True)
-""")
+# The indicator columns we use, with their DuckDB types. Both loading paths
+# below read the CSVs as text and convert these columns the same way.
+INDICATOR_TYPES = {
+    "REF_AREA": "VARCHAR",
+    "REF_AREA_LABEL": "VARCHAR",
+    "TIME_PERIOD": "INTEGER",
+    "OBS_VALUE": "DOUBLE",
+    "INDICATOR_LABEL": "VARCHAR",
+}
+
+
+def _typed_indicator_sql(source):
+    """Return a query selecting the indicator columns from `source` with their types.
+
+    Values are converted with TRY_CAST, and rows where a value doesn't convert
+    (such as '..' for a missing number) are dropped.
+    """
+    columns = ", ".join(
+        name if t == "VARCHAR" else f"TRY_CAST({name} AS {t}) AS {name}"
+        for name, t in INDICATOR_TYPES.items()
+    )
+    checks = " AND ".join(
+        f"({name} IS NULL OR TRY_CAST({name} AS {t}) IS NOT NULL)"
+        for name, t in INDICATOR_TYPES.items()
+        if t != "VARCHAR"
+    ) or "TRUE"
+    return f"SELECT {columns} FROM {source} WHERE {checks}"
+
+
+def _query_key(sql):
+    """Return a short hash of `sql`, used to tell whether a cached result is still current."""
+    return hashlib.blake2b(sql.encode(), digest_size=16).hexdigest()
+
+
+def _parquet_is_current(path, source, key):
+    """Return True if the Parquet file at `path` is newer than `source` and was written with `key`."""
+    if _is_stale(path, source):
+        return False
+    try:
+        rows = conn.execute(f"""
+            SELECT value FROM parquet_kv_metadata({_sql_literal(path)})
+            WHERE key = 'query_key'::BLOB
+        """).fetchall()
+    except duckdb.Error:
+        return False  # a damaged file is rebuilt
+    return bool(rows) and rows[0][0].decode() == key
+
+
+def _read_csv_stream(url, include_columns=None):
+    """Stream the CSV at `url` into an Arrow table of text columns, without touching disk.
+
+    Empty values become NULL, matching DuckDB's read_csv(..., all_varchar=true).
+    """
+    print(f"Streaming {url}...")
+    with session.get(url, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True  # undo gzip transfer encoding, if any
+        stream = io.BufferedReader(response.raw, 1 << 20)
+        # Read the header ourselves so every column can be declared as text
+        names = next(csv.reader([stream.readline().decode("utf-8-sig")]))
+        return pcsv.read_csv(
+            stream,
+            read_options=pcsv.ReadOptions(column_names=names),
+            convert_options=pcsv.ConvertOptions(
+                include_columns=include_columns,
+                column_types={name: pa.string() for name in names},
+                strings_can_be_null=True,
+            ),
+        )
 
-row_count = conn.execute("SELECT COUNT(*) FROM indicator_raw").fetchone()[0]
-print(f"Loaded indicator_raw: {row_count:,} rows")
 
 # %%
-# Load dictionary CSV directly into DuckDB
-conn.execute(f"""
-    CREATE OR REPLACE TABLE dictionary AS
-    SELECT DISTINCT * FROM read_csv_auto('{DICTIONARY_FILE}', header=True)
-""")
+# Load both files into DuckDB, from the cached files or straight from the web
+if CACHE_DOWNLOADS:
+    # Convert the CSVs to Parquet on the first run (or after a fresh download).
+    # Parquet stores the typed columns compressed, so later runs skip CSV parsing.
+    # Each file stores a hash of the query that wrote it, so editing
+    # INDICATOR_TYPES also rebuilds it.
+    indicator_csv = f"read_csv('{INDICATOR_STR}', header=true, all_varchar=true, parallel=true)"
+    indicator_sql = _typed_indicator_sql(indicator_csv)
+    indicator_key = _query_key(indicator_sql)
+    if not _parquet_is_current(INDICATOR_PARQUET_STR, INDICATOR_STR, indicator_key):
+        conn.execute(f"""
+            COPY ({indicator_sql})
+            TO '{INDICATOR_PARQUET_STR}'
+            (FORMAT 'parquet', COMPRESSION 'zstd', KV_METADATA {{query_key: {_sql_literal(indicator_key)}}})
+        """)
+        print(f"Saved to {INDICATOR_PARQUET}")
+    else:
+        print(f"Using cached file: {INDICATOR_PARQUET}")
+
+    # The dictionary is all text, so skip type detection
+    dictionary_sql = f"SELECT DISTINCT * FROM read_csv('{DICTIONARY_STR}', header=true, all_varchar=true, parallel=true)"
+    dictionary_key = _query_key(dictionary_sql)
+    if not _parquet_is_current(DICTIONARY_PARQUET_STR, DICTIONARY_STR, dictionary_key):
+        conn.execute(f"""
+            COPY ({dictionary_sql})
+            TO '{DICTIONARY_PARQUET_STR}'
+            (FORMAT 'parquet', COMPRESSION 'zstd', KV_METADATA {{query_key: {_sql_literal(dictionary_key)}}})
+        """)
+        print(f"Saved to {DICTIONARY_PARQUET}")
+    else:
+        print(f"Using cached file: {DICTIONARY_PARQUET}")
+
+    # indicator_raw is a view, not a table: nothing is copied yet. The file is
+    # read once, in Step 5, straight into the final cleaned table.
+    conn.execute(f"""
+        CREATE OR REPLACE VIEW indicator_raw AS
+        SELECT * FROM read_parquet('{INDICATOR_PARQUET_STR}')
+    """)
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE dictionary AS
+        SELECT * FROM read_parquet('{DICTIONARY_PARQUET_STR}')
+    """)
+else:
+    # One-shot run: stream both CSVs into Arrow tables at the same time and hand
+    # them to DuckDB directly. Only the indicator columns we use are kept.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        indicator_future = executor.submit(_read_csv_stream, INDICATOR_URL, list(INDICATOR_TYPES))
+        dictionary_future = executor.submit(_read_csv_stream, DICTIONARY_URL)
+        indicator_text, dictionary_raw = indicator_future.result(), dictionary_future.result()
+
+    conn.register("indicator_text", indicator_text)
+    conn.execute(f"CREATE OR REPLACE VIEW indicator_raw AS {_typed_indicator_sql('indicator_text')}")
+    conn.execute("CREATE OR REPLACE TABLE dictionary AS SELECT DISTINCT * FROM dictionary_raw")
 
 row_count = conn.execute("SELECT COUNT(*) FROM dictionary").fetchone()[0]
 print(f"Loaded dictionary: {row_count:,} rows")
@@ -123,180 +349,229 @@ print(f"Loaded dictionary: {row_count:,} rows")
 # ## Step 4: Explore the Data
 # 
 # Let's take a quick look at what we loaded using DuckDB queries.
+# These cells only print when `DEBUG = True` (see Step 1). `.show()` uses
+# DuckDB's own table printer, so no pandas DataFrame is created.
 
 # %%
-# Preview indicator data (returns a pandas DataFrame)
-conn.execute("SELECT * FROM indicator_raw LIMIT 5").df()
+# Preview indicator data
+if DEBUG:
+    conn.sql("SELECT * FROM indicator_raw LIMIT 5").show()
 
 # %%
 # Check indicator columns
-conn.execute("DESCRIBE indicator_raw").df()
+if DEBUG:
+    conn.sql("DESCRIBE indicator_raw").show()
 
 # %%
 # Preview dictionary data
-conn.execute("SELECT * FROM dictionary LIMIT 5").df()
+if DEBUG:
+    conn.sql("SELECT * FROM dictionary LIMIT 5").show()
 
 # %%
-# Check dictionary columns  
-conn.execute("DESCRIBE dictionary").df()
+# Check dictionary columns
+if DEBUG:
+    conn.sql("DESCRIBE dictionary").show()
 
 # %% [markdown]
 # ## Step 5: Clean and Transform the Data
 # 
-# Create a clean, analysis-ready table with proper data types and region info.
-
-# %%
-# Create a cleaned indicator table
-conn.execute("""
-    CREATE OR REPLACE TABLE indicator_clean AS
-    SELECT
-        REF_AREA AS country_code,
-        REF_AREA_LABEL AS country_name,
-        CAST(TIME_PERIOD AS INTEGER) AS year,
-        CAST(OBS_VALUE AS DOUBLE) AS value,
-        INDICATOR_LABEL AS indicator_name
-    FROM indicator_raw
-    WHERE OBS_VALUE IS NOT NULL
-      AND TIME_PERIOD IS NOT NULL
-""")
-
-row_count = conn.execute("SELECT COUNT(*) FROM indicator_clean").fetchone()[0]
-print(f"Cleaned data: {row_count:,} rows")
-
-# %%
-# Preview the cleaned data
-conn.execute("SELECT * FROM indicator_clean LIMIT 5").df()
+# Create a clean, analysis-ready table with friendly column names and region info.
+# The column types were already set when we loaded the CSV.
 
 # %%
 # Check what columns the dictionary table has
-print("Dictionary table columns:")
-print(conn.execute("DESCRIBE dictionary").df())
+if DEBUG:
+    print("Dictionary table columns:")
+    conn.sql("DESCRIBE dictionary").show()
 
 # %%
 # The World Bank data dictionary file describes variables, not country metadata.
 # We'll create a simple region mapping based on country codes.
 # For a real project, you'd download a proper country-region mapping file.
 
-# Create a region mapping table based on common World Bank region codes
-conn.execute("""
-    CREATE OR REPLACE TABLE region_mapping AS
-    SELECT * FROM (VALUES
-        -- East Asia & Pacific
-        ('CHN', 'East Asia & Pacific'),
-        ('JPN', 'East Asia & Pacific'),
-        ('KOR', 'East Asia & Pacific'),
-        ('AUS', 'East Asia & Pacific'),
-        ('IDN', 'East Asia & Pacific'),
-        ('THA', 'East Asia & Pacific'),
-        ('VNM', 'East Asia & Pacific'),
-        ('MYS', 'East Asia & Pacific'),
-        ('PHL', 'East Asia & Pacific'),
-        ('NZL', 'East Asia & Pacific'),
-        -- Europe & Central Asia
-        ('DEU', 'Europe & Central Asia'),
-        ('FRA', 'Europe & Central Asia'),
-        ('GBR', 'Europe & Central Asia'),
-        ('ITA', 'Europe & Central Asia'),
-        ('ESP', 'Europe & Central Asia'),
-        ('POL', 'Europe & Central Asia'),
-        ('NLD', 'Europe & Central Asia'),
-        ('TUR', 'Europe & Central Asia'),
-        ('RUS', 'Europe & Central Asia'),
-        ('UKR', 'Europe & Central Asia'),
-        -- Latin America & Caribbean
-        ('BRA', 'Latin America & Caribbean'),
-        ('MEX', 'Latin America & Caribbean'),
-        ('ARG', 'Latin America & Caribbean'),
-        ('COL', 'Latin America & Caribbean'),
-        ('CHL', 'Latin America & Caribbean'),
-        ('PER', 'Latin America & Caribbean'),
-        ('VEN', 'Latin America & Caribbean'),
-        -- Middle East & North Africa
-        ('EGY', 'Middle East & North Africa'),
-        ('SAU', 'Middle East & North Africa'),
-        ('IRN', 'Middle East & North Africa'),
-        ('IRQ', 'Middle East & North Africa'),
-        ('MAR', 'Middle East & North Africa'),
-        ('DZA', 'Middle East & North Africa'),
-        -- North America
-        ('USA', 'North America'),
-        ('CAN', 'North America'),
-        -- South Asia
-        ('IND', 'South Asia'),
-        ('PAK', 'South Asia'),
-        ('BGD', 'South Asia'),
-        ('LKA', 'South Asia'),
-        ('NPL', 'South Asia'),
-        -- Sub-Saharan Africa
-        ('NGA', 'Sub-Saharan Africa'),
-        ('ZAF', 'Sub-Saharan Africa'),
-        ('KEN', 'Sub-Saharan Africa'),
-        ('ETH', 'Sub-Saharan Africa'),
-        ('GHA', 'Sub-Saharan Africa'),
-        ('TZA', 'Sub-Saharan Africa')
-    ) AS t(country_code, region)
-""")
-
-print("Created region_mapping table")
+# Region for each country code, based on common World Bank region codes
+REGION_MAPPING = {
+    # East Asia & Pacific
+    "CHN": "East Asia & Pacific",
+    "JPN": "East Asia & Pacific",
+    "KOR": "East Asia & Pacific",
+    "AUS": "East Asia & Pacific",
+    "IDN": "East Asia & Pacific",
+    "THA": "East Asia & Pacific",
+    "VNM": "East Asia & Pacific",
+    "MYS": "East Asia & Pacific",
+    "PHL": "East Asia & Pacific",
+    "NZL": "East Asia & Pacific",
+    # Europe & Central Asia
+    "DEU": "Europe & Central Asia",
+    "FRA": "Europe & Central Asia",
+    "GBR": "Europe & Central Asia",
+    "ITA": "Europe & Central Asia",
+    "ESP": "Europe & Central Asia",
+    "POL": "Europe & Central Asia",
+    "NLD": "Europe & Central Asia",
+    "TUR": "Europe & Central Asia",
+    "RUS": "Europe & Central Asia",
+    "UKR": "Europe & Central Asia",
+    # Latin America & Caribbean
+    "BRA": "Latin America & Caribbean",
+    "MEX": "Latin America & Caribbean",
+    "ARG": "Latin America & Caribbean",
+    "COL": "Latin America & Caribbean",
+    "CHL": "Latin America & Caribbean",
+    "PER": "Latin America & Caribbean",
+    "VEN": "Latin America & Caribbean",
+    # Middle East & North Africa
+    "EGY": "Middle East & North Africa",
+    "SAU": "Middle East & North Africa",
+    "IRN": "Middle East & North Africa",
+    "IRQ": "Middle East & North Africa",
+    "MAR": "Middle East & North Africa",
+    "DZA": "Middle East & North Africa",
+    # North America
+    "USA": "North America",
+    "CAN": "North America",
+    # South Asia
+    "IND": "South Asia",
+    "PAK": "South Asia",
+    "BGD": "South Asia",
+    "LKA": "South Asia",
+    "NPL": "South Asia",
+    # Sub-Saharan Africa
+    "NGA": "Sub-Saharan Africa",
+    "ZAF": "Sub-Saharan Africa",
+    "KEN": "Sub-Saharan Africa",
+    "ETH": "Sub-Saharan Africa",
+    "GHA": "Sub-Saharan Africa",
+    "TZA": "Sub-Saharan Africa",
+}
+
+# Turn the mapping into a SQL CASE expression. With only a few dozen countries,
+# checking the code against each region's list is cheaper than a join.
+codes_by_region = {}
+for code, region in REGION_MAPPING.items():
+    codes_by_region.setdefault(region, []).append(code)
+
+region_case = "CASE " + " ".join(
+    f"WHEN country_code IN ({', '.join(_sql_literal(code) for code in codes)}) THEN {_sql_literal(region)}"
+    for region, codes in codes_by_region.items()
+) + " ELSE 'Other' END"
+
+print(f"Mapped {len(REGION_MAPPING)} countries to {len(codes_by_region)} regions")
 
 # %%
-# Join with region mapping to add region information
-conn.execute("""
-    CREATE OR REPLACE TABLE indicator_with_region AS
+# Clean the indicator data and add regions in a single query.
+# DuckDB reads the data, renames and filters the columns, and looks up the
+# regions in one pass, without storing any in-between tables.
+#
+# The result is saved as an Arrow IPC file, tagged with a hash of the query.
+# Later runs memory-map that file instead of rebuilding the table, unless the
+# data is newer or the query (including REGION_MAPPING) has changed.
+indicator_with_region_sql = f"""
     SELECT
-        i.*,
-        COALESCE(r.region, 'Other') AS region
-    FROM indicator_clean i
-    LEFT JOIN region_mapping r ON UPPER(i.country_code) = r.country_code
-""")
-
-print("Created table: indicator_with_region")
+        *,
+        {region_case} AS region
+    FROM (
+        SELECT
+            UPPER(REF_AREA) AS country_code,
+            REF_AREA_LABEL AS country_name,
+            TIME_PERIOD AS year,
+            OBS_VALUE AS value,
+            INDICATOR_LABEL AS indicator_name
+        FROM indicator_raw
+        WHERE OBS_VALUE IS NOT NULL
+          AND TIME_PERIOD IS NOT NULL
+    )
+"""
+query_key = _query_key(indicator_with_region_sql).encode()
+
+indicator_with_region = None
+if CACHE_DOWNLOADS and not _is_stale(INDICATOR_ARROW_STR, INDICATOR_PARQUET_STR):
+    try:
+        with pa.memory_map(INDICATOR_ARROW_STR) as source:
+            cached = pa.ipc.open_file(source)
+            if (cached.schema.metadata or {}).get(b"query_key") == query_key:
+                # The table keeps the mapped memory alive after the file is closed
+                indicator_with_region = cached.read_all()
+    except pa.ArrowInvalid:
+        pass  # a damaged cache file is rebuilt below
+
+if indicator_with_region is not None:
+    conn.register("indicator_with_region", indicator_with_region)
+    print(f"Using cached file: {INDICATOR_ARROW}")
+else:
+    conn.execute(f"CREATE OR REPLACE TABLE indicator_with_region AS {indicator_with_region_sql}")
+
+    if CACHE_DOWNLOADS:
+        # Stream the table out in record batches so only one batch is in memory
+        # at a time. As with the downloads, write to a `.part` file and move it
+        # into place only once it is complete.
+        reader = conn.execute("SELECT * FROM indicator_with_region").to_arrow_reader(122880)
+        metadata = {b"query_key": query_key}
+        tmp = INDICATOR_ARROW.with_suffix(INDICATOR_ARROW.suffix + ".part")
+        try:
+            with pa.OSFile(os.fspath(tmp), "wb") as sink:
+                with pa.ipc.new_file(sink, reader.schema.with_metadata(metadata)) as writer:
+                    for batch in reader:
+                        writer.write_batch(batch.replace_schema_metadata(metadata))
+            os.replace(tmp, INDICATOR_ARROW_STR)
+        finally:
+            tmp.unlink(missing_ok=True)
+        print(f"Saved to {INDICATOR_ARROW}")
+
+row_count = conn.execute("SELECT COUNT(*) FROM indicator_with_region").fetchone()[0]
+print(f"indicator_with_region: {row_count:,} rows")
 
 # %%
 # Preview with regions
-conn.execute("SELECT * FROM indicator_with_region LIMIT 10").df()
+if DEBUG:
+    conn.sql("SELECT * FROM indicator_with_region LIMIT 10").show()
 
 # %% [markdown]
 # ## Step 6: Aggregate by Region
 # 
 # Calculate average labor force participation rate by region and year.
+# Countries outside our region mapping (the 'Other' bucket) are left out of the chart.
 
 # %%
-# Query regional averages and return as pandas DataFrame for charting
-regional_df = conn.execute("""
+# Query regional averages and return as an Arrow table for charting.
+# The World Bank file has at most one value per country per year, so within a
+# (region, year) group COUNT(*) is the number of countries. If you combine this
+# with data that repeats country-years, use COUNT(DISTINCT country_code) instead.
+# Arrow keeps DuckDB's columnar layout, so there's no conversion to pandas.
+regional_table = conn.execute("""
     SELECT
         region,
         year,
         AVG(value) AS avg_participation_rate,
-        COUNT(DISTINCT country_code) AS num_countries
+        COUNT(*) AS num_countries
     FROM indicator_with_region
-    WHERE region != 'Unknown'
-      AND region IS NOT NULL
-      AND region != ''
+    WHERE region <> 'Other'
     GROUP BY region, year
-    HAVING COUNT(DISTINCT country_code) >= 3
+    HAVING COUNT(*) >= 3
     ORDER BY region, year
-""").df()
+""").to_arrow_table()
 
-print(f"Regional aggregates: {len(regional_df)} rows")
-regional_df.head(10)
+print(f"Regional aggregates: {regional_table.num_rows} rows")
+regional_table.slice(0, 10)
 
 # %%
 # What regions do we have?
-regional_df['region'].unique()
+regional_table['region'].unique()
 
 # %% [markdown]
 # ## Step 7: Create the Visualization
 # 
 # Create a line chart showing labor force participation trends by region.
-
-# %%
-# Configure Altair to handle large datasets
-alt.data_transformers.disable_max_rows()
+#
+# The chart shown here embeds its data. The saved HTML file instead loads the
+# data from `regional.json` next to it, so the rows aren't copied into the page.
+# Browsers may block loading that file from a `file://` page, so view the saved
+# chart through a local web server (e.g. `python -m http.server` in `data/`).
 
 # %%
 # Create the chart
-chart = alt.Chart(regional_df).mark_line(point=True).encode(
+chart = alt.Chart(regional_table).mark_line(point=True).encode(
     x=alt.X('year:Q', title='Year'),
     y=alt.Y('avg_participation_rate:Q', title='Average Participation Rate (%)'),
     color=alt.Color('region:N', title='Region'),
@@ -314,32 +589,53 @@ chart = alt.Chart(regional_df).mark_line(point=True).encode(
 
 chart
 
+# %%
+# Save the regional aggregates for the saved chart to load
+REGIONAL_JSON = DATA_DIR / "regional.json"
+with open(REGIONAL_JSON, "w") as f:
+    json.dump(regional_table.to_pylist(), f)
+print(f"Chart data saved to: {REGIONAL_JSON}")
+
 # %%
 # Save the chart as an HTML file
 CHART_FILE = DATA_DIR / "regional_labor_force_chart.html"
-chart.save(str(CHART_FILE))
+CHART_STR = os.fspath(CHART_FILE)
+
+# The URL is relative to the HTML file, which is also in data/
+file_chart = chart.copy()
+file_chart.data = alt.UrlData(REGIONAL_JSON.name)
+file_chart.save(CHART_STR)
 print(f"Chart saved to: {CHART_FILE}")
 
 # %% [markdown]
 # ## Step 8: Summary Statistics
 
 # %%
-# Get summary stats (DuckDB query → pandas DataFrame)
-summary_df = conn.execute("""
+# Get summary stats (DuckDB query → Arrow table)
+summary_table = conn.execute("""
     SELECT
         region,
         MIN(year) AS first_year,
         MAX(year) AS last_year,
-        ROUND(AVG(value), 1) AS avg_rate,
+        CAST(AVG(value) AS DECIMAL(18, 1)) AS avg_rate,
         COUNT(*) AS data_points
     FROM indicator_with_region
-    WHERE region != 'Unknown' AND region IS NOT NULL AND region != ''
     GROUP BY region
     ORDER BY avg_rate DESC
-""").df()
+""").to_arrow_table()
 
 print("Summary by Region:")
-summary_df
+summary_table
+
+# %%
+# Optionally save the final tables to a DuckDB database file
+if SAVE_TO_DISK:
+    DB_STR = os.fspath(DATA_DIR / "worldbank.duckdb")
+    conn.execute(f"ATTACH '{DB_STR}' AS fs")
+    conn.execute("CREATE OR REPLACE TABLE fs.indicator_with_region AS SELECT * FROM indicator_with_region")
+    conn.execute("CREATE OR REPLACE TABLE fs.summary AS SELECT * FROM summary_table")
+    conn.execute("DETACH fs")
+    print(f"Saved tables to: {DB_STR}")
 
 # %%
 # Close the database connection
@@ -352,5 +648,8 @@ print("Done! Database connection closed.")
 # This notebook created the following files in the `data/` folder:
 # - `labor_force_data.csv` - Raw indicator data
 # - `data_dictionary.csv` - Metadata about countries
-# - `worldbank.duckdb` - DuckDB database with cleaned tables
+# - `labor_force_data.parquet`, `data_dictionary.parquet` - Faster-loading copies of the CSVs
+# - `indicator_with_region.arrows` - Cleaned table with regions, in Arrow IPC format
+# - `worldbank.duckdb` - DuckDB database with cleaned tables (only if `SAVE_TO_DISK = True`)
 # - `regional_labor_force_chart.html` - Interactive chart
+# - `regional.json` - Data loaded by the chart